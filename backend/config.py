@@ -0,0 +1,58 @@
+"""
+Application Settings
+
+Environment-derived configuration, read once and cached.
+"""
+
+import os
+from functools import lru_cache
+from typing import List, Optional
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class Settings(BaseSettings):
+    """Settings loaded from environment variables (and .env)"""
+
+    model_config = SettingsConfigDict(env_file=".env", extra="ignore")
+
+    # Supabase
+    supabase_url: Optional[str] = None
+    supabase_key: Optional[str] = None
+    supabase_service_key: Optional[str] = None
+
+    # Application
+    environment: str = "development"
+    debug: bool = True
+    port: int = 8000
+    host: str = "0.0.0.0"
+    workers: int = 2 * (os.cpu_count() or 1) + 1
+
+    # CORS (comma-separated)
+    cors_origins: str = "http://localhost:3000,http://localhost:5173"
+
+    # File upload
+    max_upload_size_mb: int = 100
+
+    @property
+    def is_development(self) -> bool:
+        return self.environment == "development"
+
+    @property
+    def cors_origin_list(self) -> List[str]:
+        return self.cors_origins.split(",")
+
+    @property
+    def max_upload_size_bytes(self) -> int:
+        return self.max_upload_size_mb * 1024 * 1024
+
+
+@lru_cache()
+def get_settings() -> Settings:
+    """
+    Get Settings singleton.
+
+    Returns:
+        Settings instance
+    """
+    return Settings()
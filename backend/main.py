@@ -7,8 +7,11 @@ and model inference.
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-import os
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
+from concurrent.futures import ThreadPoolExecutor
+import anyio.to_thread
+import asyncio
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -16,6 +19,10 @@ load_dotenv()
 
 # Import routers
 from routers import videos, annotations
+from services.supabase_client import HTTP_LIMITS, get_supabase_service
+from config import get_settings
+
+settings = get_settings()
 
 # Create FastAPI app
 app = FastAPI(
@@ -23,15 +30,47 @@ app = FastAPI(
     description="Collaborative Fish Detection & Annotation Platform",
     version="0.1.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse
 )
 
-# Configure CORS
-origins = os.getenv("CORS_ORIGINS", "http://localhost:3000,http://localhost:5173").split(",")
+# Reject oversized uploads from their Content-Length, before the body is
+# read and spooled (allows some headroom for multipart form overhead)
+MAX_REQUEST_SIZE = settings.max_upload_size_bytes + 1024 * 1024
+
+
+class LimitRequestSizeMiddleware:
+    """Return 413 for requests whose declared body size is too large"""
+
+    def __init__(self, app, max_size: int):
+        self.app = app
+        self.max_size = max_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            for name, value in scope["headers"]:
+                if name == b"content-length":
+                    if value.isdigit() and int(value) > self.max_size:
+                        response = ORJSONResponse(
+                            status_code=413,
+                            content={"detail": f"File too large. Maximum size is {settings.max_upload_size_mb}MB"}
+                        )
+                        await response(scope, receive, send)
+                        return
+                    break
+
+        await self.app(scope, receive, send)
+
 
+app.add_middleware(LimitRequestSizeMiddleware, max_size=MAX_REQUEST_SIZE)
+
+# Compress larger responses (e.g. video lists)
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
+# Configure CORS (added last so it also wraps the responses above)
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=origins,
+    allow_origins=settings.cors_origin_list,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
@@ -60,7 +99,7 @@ async def root():
 
 # Supabase connection test endpoint
 @app.get("/supabase-test", tags=["health"])
-async def test_supabase_connection():
+def test_supabase_connection():
     """Test Supabase connection"""
     try:
         from services.supabase_client import get_supabase_client
@@ -75,7 +114,7 @@ async def test_supabase_connection():
             "buckets": [b["name"] for b in buckets] if buckets else []
         }
     except Exception as e:
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content={"status": "error", "message": str(e)}
         )
@@ -92,9 +131,18 @@ app.include_router(annotations.router)
 async def startup_event():
     """Run on application startup"""
     print("🚀 Ocean-ML API starting...")
-    print(f"📍 Environment: {os.getenv('ENVIRONMENT', 'development')}")
-    print(f"🔧 Debug mode: {os.getenv('DEBUG', 'True')}")
-    print(f"🌐 CORS origins: {origins}")
+
+    # Supabase calls run in threads (asyncio.to_thread for the service,
+    # anyio for sync endpoints). Size both pools to the HTTP connection
+    # pool rather than the much smaller defaults.
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=HTTP_LIMITS.max_connections)
+    )
+    anyio.to_thread.current_default_thread_limiter().total_tokens = HTTP_LIMITS.max_connections
+
+    print(f"📍 Environment: {settings.environment}")
+    print(f"🔧 Debug mode: {settings.debug}")
+    print(f"🌐 CORS origins: {settings.cors_origin_list}")
     print("✅ API ready!")
 
 # Shutdown event
@@ -103,16 +151,26 @@ async def shutdown_event():
     """Run on application shutdown"""
     print("👋 Ocean-ML API shutting down...")
 
+    # Insert queued activity log entries (if the service was ever created)
+    if get_supabase_service.cache_info().currsize:
+        await get_supabase_service().flush_activity_log()
+
 # Run with: uvicorn main:app --reload
 if __name__ == "__main__":
     import uvicorn
 
-    port = int(os.getenv("PORT", 8000))
-    host = os.getenv("HOST", "0.0.0.0")
+    development = settings.is_development
+
+    # Worker processes (reload only supports a single worker)
+    workers = 1 if development else settings.workers
 
+    # uvicorn[standard] installs uvloop and httptools, which uvicorn
+    # picks automatically where available (uvloop isn't on Windows)
     uvicorn.run(
         "main:app",
-        host=host,
-        port=port,
-        reload=True
+        host=settings.host,
+        port=settings.port,
+        reload=development,
+        workers=workers,
+        access_log=development
     )
@@ -4,7 +4,8 @@ Annotation management endpoints
 
 from fastapi import APIRouter, HTTPException, Depends
 from uuid import UUID
-from datetime import datetime, timedelta
+from datetime import datetime
+from typing import Optional
 
 from models.annotation import (
     Annotation,
@@ -12,14 +13,16 @@ from models.annotation import (
     AnnotationCompleteRequest
 )
 from models.video import VideoLockRequest, VideoLockResponse
-from services.supabase_client import SupabaseService
+from services.supabase_client import SupabaseService, get_supabase_service
 
 router = APIRouter(prefix="/api/annotations", tags=["annotations"])
 
 
-def get_supabase_service():
-    """Dependency to get Supabase service"""
-    return SupabaseService()
+def _parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """Parse an ISO timestamp from Supabase (None if not set)"""
+    if value is None:
+        return None
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
 
 
 @router.post("/annotate/{video_id}", response_model=VideoLockResponse)
@@ -39,37 +42,34 @@ async def start_annotation(
         Lock status and video download URL
     """
     try:
-        # Get video
-        video = await service.get_video_by_id(str(video_id))
+        # Acquire lock (fails if another user holds an unexpired lock)
+        lock = await service.acquire_video_lock(
+            str(video_id),
+            "current_user_id",  # TODO: Get from auth
+            timeout_minutes
+        )
+
+        video = lock["video"]
         if not video:
             raise HTTPException(status_code=404, detail="Video not found")
 
-        # Check if already locked
-        if video.get("locked_by") and video.get("lock_expires_at"):
-            lock_expires = datetime.fromisoformat(video["lock_expires_at"].replace("Z", "+00:00"))
-            if lock_expires > datetime.now():
-                return VideoLockResponse(
-                    success=False,
-                    video_id=video_id,
-                    locked_by=video["locked_by"],
-                    locked_until=lock_expires,
-                    message="Video is currently being annotated by another user"
+        if not lock["acquired"]:
+            # No holder means the video exists but this user may not lock it
+            return VideoLockResponse(
+                success=False,
+                video_id=video_id,
+                locked_by=video["locked_by"],
+                locked_until=_parse_timestamp(video["lock_expires_at"]),
+                message=(
+                    "Video is currently being annotated by another user"
+                    if video["locked_by"] else "Video could not be locked"
                 )
-
-        # Acquire lock
-        lock_expires_at = datetime.now() + timedelta(minutes=timeout_minutes)
-        updates = {
-            "locked_by": "current_user_id",  # TODO: Get from auth
-            "locked_at": datetime.now().isoformat(),
-            "lock_expires_at": lock_expires_at.isoformat()
-        }
-
-        await service.update_video(str(video_id), updates)
+            )
 
         # Get download URL
         video_url = service.get_public_url("videos", video["storage_path"])
 
-        # Log activity
+        # Log activity (queued and inserted in batches)
         await service.log_activity(
             action_type="annotation_started",
             resource_type="video",
@@ -79,8 +79,8 @@ async def start_annotation(
         return VideoLockResponse(
             success=True,
             video_id=video_id,
-            locked_by="current_user_id",
-            locked_until=lock_expires_at,
+            locked_by=video["locked_by"],
+            locked_until=_parse_timestamp(video["lock_expires_at"]),
             message=f"Video locked for annotation. Download URL: {video_url}"
         )
 
@@ -105,9 +105,8 @@ async def complete_annotation(
         Created annotation record
     """
     try:
-        # Get video
-        video = await service.get_video_by_id(str(request.video_id))
-        if not video:
+        # Check if video exists
+        if not await service.video_exists(str(request.video_id)):
             raise HTTPException(status_code=404, detail="Video not found")
 
         # Validate YOLO format (basic check)
@@ -116,53 +115,24 @@ async def complete_annotation(
 
         # Upload annotation file to storage
         annotation_path = f"annotations/{request.video_id}.txt"
-        service.upload_file(
+        await service.upload_file(
             "annotations",
             annotation_path,
             request.annotation_data.encode("utf-8")
         )
 
-        # Create annotation record
-        annotation_data = {
-            "video_id": str(request.video_id),
-            "frames_annotated": request.frames_annotated,
-            "detection_count": request.detection_count,
-            "species_counts": request.species_counts,
-            "storage_path": annotation_path
-        }
-
-        # Use upsert (insert or update if exists)
-        response = service.client.table("annotations").upsert(annotation_data).execute()
-        annotation = response.data[0] if response.data else None
+        # Save annotation record, mark video annotated, release lock and log activity
+        annotation = await service.complete_annotation(
+            str(request.video_id),
+            frames_annotated=request.frames_annotated,
+            detection_count=request.detection_count,
+            species_counts=request.species_counts,
+            storage_path=annotation_path
+        )
 
         if not annotation:
             raise HTTPException(status_code=500, detail="Failed to create annotation")
 
-        # Update video record
-        video_updates = {
-            "annotated": True,
-            "annotated_by": "current_user_id",  # TODO: Get from auth
-            "annotated_at": datetime.now().isoformat(),
-            "annotation_storage_path": annotation_path,
-            "detection_count": request.detection_count,
-            "locked_by": None,  # Release lock
-            "locked_at": None,
-            "lock_expires_at": None
-        }
-
-        await service.update_video(str(request.video_id), video_updates)
-
-        # Log activity
-        await service.log_activity(
-            action_type="annotation_completed",
-            resource_type="video",
-            resource_id=str(request.video_id),
-            metadata={
-                "frames_annotated": request.frames_annotated,
-                "detection_count": request.detection_count
-            }
-        )
-
         return annotation
 
     except HTTPException:
@@ -186,12 +156,12 @@ async def get_annotation(
         Annotation details
     """
     try:
-        response = service.client.table("annotations").select("*").eq("video_id", str(video_id)).execute()
+        annotation = await service.get_annotation(str(video_id))
 
-        if not response.data:
+        if not annotation:
             raise HTTPException(status_code=404, detail="Annotation not found")
 
-        return response.data[0]
+        return annotation
 
     except HTTPException:
         raise
@@ -214,36 +184,15 @@ async def delete_annotation(
         Success message
     """
     try:
-        # Get annotation
-        response = service.client.table("annotations").select("*").eq("video_id", str(video_id)).execute()
+        # Delete from database, reset video record and log activity
+        annotation = await service.delete_annotation(str(video_id))
 
-        if not response.data:
+        if not annotation:
             raise HTTPException(status_code=404, detail="Annotation not found")
 
-        annotation = response.data[0]
-
         # Delete from storage
         if annotation.get("storage_path"):
-            service.delete_file("annotations", annotation["storage_path"])
-
-        # Delete from database
-        service.client.table("annotations").delete().eq("video_id", str(video_id)).execute()
-
-        # Update video record
-        await service.update_video(str(video_id), {
-            "annotated": False,
-            "annotated_by": None,
-            "annotated_at": None,
-            "annotation_storage_path": None,
-            "detection_count": 0
-        })
-
-        # Log activity
-        await service.log_activity(
-            action_type="annotation_deleted",
-            resource_type="video",
-            resource_id=str(video_id)
-        )
+            await service.delete_file("annotations", annotation["storage_path"])
 
         return {"message": "Annotation deleted successfully", "video_id": str(video_id)}
 
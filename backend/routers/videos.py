@@ -5,6 +5,7 @@ Video management endpoints
 from fastapi import APIRouter, HTTPException, UploadFile, File, Depends
 from typing import List, Optional
 from uuid import UUID, uuid4
+import asyncio
 import os
 
 from models.video import (
@@ -15,16 +16,12 @@ from models.video import (
     VideoLockRequest,
     VideoLockResponse
 )
-from services.supabase_client import SupabaseService, get_supabase_client
+from services.supabase_client import SupabaseService, get_supabase_service
+from config import get_settings
 
 router = APIRouter(prefix="/api/videos", tags=["videos"])
 
 
-def get_supabase_service():
-    """Dependency to get Supabase service"""
-    return SupabaseService()
-
-
 @router.get("/", response_model=VideoListResponse)
 async def list_videos(
     limit: int = 100,
@@ -41,15 +38,15 @@ async def list_videos(
         annotated: Filter by annotation status (None = all)
     """
     try:
-        videos = await service.get_videos(limit=limit, offset=offset)
-
-        # Filter by annotation status if specified
-        if annotated is not None:
-            videos = [v for v in videos if v.get("annotated") == annotated]
+        videos, total = await service.get_videos(
+            limit=limit,
+            offset=offset,
+            annotated=annotated
+        )
 
         return {
             "videos": videos,
-            "total": len(videos),
+            "total": total,
             "limit": limit,
             "offset": offset
         }
@@ -102,11 +99,13 @@ async def upload_video(
     if not file.content_type or not file.content_type.startswith("video/"):
         raise HTTPException(status_code=400, detail="File must be a video")
 
-    # Check file size (max 100MB)
-    max_size = int(os.getenv("MAX_UPLOAD_SIZE_MB", 100)) * 1024 * 1024
-    file_data = await file.read()
+    # Check file size (max 100MB) without reading the upload into memory
+    max_size = get_settings().max_upload_size_bytes
+    file.file.seek(0, os.SEEK_END)
+    file_size = file.file.tell()
+    file.file.seek(0)
 
-    if len(file_data) > max_size:
+    if file_size > max_size:
         raise HTTPException(
             status_code=413,
             detail=f"File too large. Maximum size is {max_size / (1024*1024):.0f}MB"
@@ -118,25 +117,31 @@ async def upload_video(
         file_extension = file.filename.split(".")[-1] if "." in file.filename else "mp4"
         storage_path = f"videos/{video_id}.{file_extension}"
 
-        # Upload to Supabase Storage
-        service.upload_file("videos", storage_path, file_data)
+        # Stream to Supabase Storage
+        await service.upload_stream(
+            "videos",
+            storage_path,
+            file.file,
+            file_size,
+            file.content_type
+        )
 
         # Create database record
         video_data = {
             "id": str(video_id),
             "filename": file.filename,
             "storage_path": storage_path,
-            "file_size_bytes": len(file_data)
+            "file_size_bytes": file_size
         }
 
         video = await service.create_video(video_data)
 
-        # Log activity
+        # Log activity (queued and inserted in batches)
         await service.log_activity(
             action_type="video_uploaded",
             resource_type="video",
             resource_id=str(video_id),
-            metadata={"filename": file.filename, "size": len(file_data)}
+            metadata={"filename": file.filename, "size": file_size}
         )
 
         return video
@@ -163,8 +168,7 @@ async def update_video(
     """
     try:
         # Check if video exists
-        existing_video = await service.get_video_by_id(str(video_id))
-        if not existing_video:
+        if not await service.video_exists(str(video_id)):
             raise HTTPException(status_code=404, detail="Video not found")
 
         # Update video
@@ -197,29 +201,19 @@ async def delete_video(
         Success message
     """
     try:
-        # Get video details
-        video = await service.get_video_by_id(str(video_id))
+        # Delete from database and log activity (returns the deleted record)
+        video = await service.delete_video(str(video_id))
         if not video:
             raise HTTPException(status_code=404, detail="Video not found")
 
-        # Delete from storage
+        # Delete video and annotation files from storage concurrently
+        deletions = []
         if video.get("storage_path"):
-            service.delete_file("videos", video["storage_path"])
-
-        # Delete annotation if exists
+            deletions.append(service.delete_file("videos", video["storage_path"]))
         if video.get("annotation_storage_path"):
-            service.delete_file("annotations", video["annotation_storage_path"])
-
-        # Delete from database
-        await service.delete_video(str(video_id))
+            deletions.append(service.delete_file("annotations", video["annotation_storage_path"]))
 
-        # Log activity
-        await service.log_activity(
-            action_type="video_deleted",
-            resource_type="video",
-            resource_id=str(video_id),
-            metadata={"filename": video.get("filename")}
-        )
+        await asyncio.gather(*deletions)
 
         return {"message": "Video deleted successfully", "video_id": str(video_id)}
 
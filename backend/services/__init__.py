@@ -5,11 +5,13 @@ Services package
 from .supabase_client import (
     get_supabase_client,
     get_supabase_admin_client,
+    get_supabase_service,
     SupabaseService
 )
 
 __all__ = [
     "get_supabase_client",
     "get_supabase_admin_client",
+    "get_supabase_service",
     "SupabaseService",
 ]
@@ -4,12 +4,105 @@ Supabase Client Service
 Provides singleton Supabase client instance for database and storage operations.
 """
 
-import os
-from supabase import create_client, Client
-from typing import Optional
+import asyncio
+import threading
+import time
+import httpx
+from supabase import Client
+from supabase.lib.client_options import ClientOptions
+from supabase.lib.storage_client import SupabaseStorageClient
+from storage3.utils import StorageException
+from postgrest import SyncPostgrestClient
+from postgrest.utils import SyncClient
+from typing import BinaryIO, Dict, List, Optional, Tuple
 from functools import lru_cache
 
+from config import get_settings
+
 _supabase_client: Optional[Client] = None
+_reconnect_lock = threading.Lock()
+
+# Limits for each HTTP session's connection pool. Every PostgREST and
+# Storage session gets its own transport, so a client can hold up to
+# 2 x max_connections connections (and the admin client as many again).
+# Bounded so concurrent requests can't exhaust sockets, with keepalive
+# expiry and connect retries so stale connections don't surface as 500s.
+HTTP_LIMITS = httpx.Limits(
+    max_connections=60,
+    max_keepalive_connections=40,
+    keepalive_expiry=60
+)
+HTTP_RETRIES = 3
+HTTP_TIMEOUT = 30
+
+# Chunk size used when streaming uploads to storage
+UPLOAD_CHUNK_SIZE = 4 * 1024 * 1024
+
+# Short-lived cache of video records, so a write right after a read
+# (or a read shortly after another) doesn't hit the database again
+VIDEO_CACHE_TTL_SECONDS = 5
+VIDEO_CACHE_MAX_SIZE = 1024
+
+# Public URLs never change for a path; keep at most this many
+PUBLIC_URL_CACHE_MAX_SIZE = 4096
+
+# Activity log entries are queued and inserted in batches of up to
+# ACTIVITY_BATCH_SIZE, at most ACTIVITY_FLUSH_INTERVAL seconds apart
+ACTIVITY_BATCH_SIZE = 100
+ACTIVITY_FLUSH_INTERVAL = 0.5
+
+
+def _create_http_session(base_url: str, headers: dict, timeout) -> SyncClient:
+    """Create an httpx session backed by the bounded connection pool"""
+    return SyncClient(
+        base_url=base_url,
+        headers=headers,
+        timeout=timeout,
+        transport=httpx.HTTPTransport(limits=HTTP_LIMITS, retries=HTTP_RETRIES)
+    )
+
+
+class _PooledPostgrestClient(SyncPostgrestClient):
+    """PostgREST client using the pooled HTTP transport"""
+
+    def create_session(self, base_url, headers, timeout):
+        return _create_http_session(base_url, headers, timeout)
+
+
+class _PooledStorageClient(SupabaseStorageClient):
+    """Storage client using the pooled HTTP transport"""
+
+    def _create_session(self, base_url, headers, timeout):
+        return _create_http_session(base_url, headers, timeout)
+
+
+class _PooledClient(Client):
+    """Supabase client whose PostgREST and Storage sessions use the pooled transport"""
+
+    @staticmethod
+    def _init_postgrest_client(rest_url, headers, schema, timeout=HTTP_TIMEOUT):
+        return _PooledPostgrestClient(
+            rest_url, headers=headers, schema=schema, timeout=timeout
+        )
+
+    @staticmethod
+    def _init_storage_client(storage_url, headers, storage_client_timeout=HTTP_TIMEOUT):
+        return _PooledStorageClient(storage_url, headers, storage_client_timeout)
+
+
+def create_client(supabase_url: str, supabase_key: str) -> Client:
+    """
+    Create a Supabase client using the pooled HTTP transport.
+
+    Each client gets its own ClientOptions, since supabase-py mutates the
+    headers of the options it is given.
+    """
+    options = ClientOptions(
+        postgrest_client_timeout=HTTP_TIMEOUT,
+        storage_client_timeout=HTTP_TIMEOUT
+    )
+    return _PooledClient(supabase_url, supabase_key, options)
+
 
 @lru_cache()
 def get_supabase_client() -> Client:
@@ -25,8 +118,9 @@ def get_supabase_client() -> Client:
     global _supabase_client
 
     if _supabase_client is None:
-        supabase_url = os.getenv("SUPABASE_URL")
-        supabase_key = os.getenv("SUPABASE_KEY")
+        settings = get_settings()
+        supabase_url = settings.supabase_url
+        supabase_key = settings.supabase_key
 
         if not supabase_url or not supabase_key:
             raise ValueError(
@@ -38,9 +132,10 @@ def get_supabase_client() -> Client:
     return _supabase_client
 
 
+@lru_cache()
 def get_supabase_admin_client() -> Client:
     """
-    Get Supabase client with service role (admin) permissions.
+    Get Supabase client singleton with service role (admin) permissions.
 
     Use this for operations that bypass Row Level Security.
 
@@ -50,8 +145,9 @@ def get_supabase_admin_client() -> Client:
     Raises:
         ValueError: If SUPABASE_SERVICE_KEY not set
     """
-    supabase_url = os.getenv("SUPABASE_URL")
-    service_key = os.getenv("SUPABASE_SERVICE_KEY")
+    settings = get_settings()
+    supabase_url = settings.supabase_url
+    service_key = settings.supabase_service_key
 
     if not supabase_url or not service_key:
         raise ValueError(
@@ -68,53 +164,288 @@ class SupabaseService:
 
     def __init__(self, client: Optional[Client] = None):
         self.client = client or get_supabase_client()
+        self._video_cache: Dict[str, Tuple[float, dict]] = {}
+        # Bumped on every invalidation, so reads that overlap a write don't
+        # cache the row they fetched before it
+        self._video_cache_generation = 0
+        self._public_url_cache: Dict[Tuple[str, str], str] = {}
+        self._activity_queue: Optional[asyncio.Queue] = None
+        self._activity_task: Optional[asyncio.Task] = None
+
+    # Connection handling
+    @staticmethod
+    def is_connection_error(error: Exception) -> bool:
+        """
+        Check if an error happened before the request reached the server.
+
+        Only these errors are safe to retry: a read error or timeout may
+        come after a write was applied, and retrying it would repeat it.
+        A PoolTimeout isn't included, as it means the pool is busy rather
+        than that the server is unreachable.
+        """
+        return isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout))
+
+    def force_reconnect(self, failed_client: Client):
+        """
+        Replace a failed client with a new one.
+
+        The failed client isn't closed here, as other threads may still be
+        running requests on it; its connections are released once those
+        finish and it is garbage collected.
+
+        Args:
+            failed_client: Client whose request failed; if another thread has
+                already replaced it, the new client is reused
+        """
+        global _supabase_client
+
+        with _reconnect_lock:
+            if self.client is not failed_client:
+                return
+
+            _supabase_client = None
+            get_supabase_client.cache_clear()
+            self.client = get_supabase_client()
+
+    def _execute(self, query):
+        """
+        Execute a query, reconnecting and retrying once if it couldn't connect.
+
+        Args:
+            query: Callable that builds the query from self.client
+        """
+        client = self.client
+        try:
+            return query().execute()
+        except Exception as e:
+            if not self.is_connection_error(e):
+                raise
+            self.force_reconnect(client)
+            return query().execute()
+
+    async def _run(self, query):
+        """Run _execute in a worker thread so the event loop isn't blocked"""
+        return await asyncio.to_thread(self._execute, query)
 
     # Videos operations
-    async def get_videos(self, limit: int = 100, offset: int = 0):
-        """Get list of videos"""
-        response = self.client.table("videos").select("*").range(offset, offset + limit - 1).execute()
-        return response.data
+    async def get_videos(
+        self,
+        limit: int = 100,
+        offset: int = 0,
+        annotated: Optional[bool] = None
+    ):
+        """
+        Get a page of videos and the total number of matching videos.
+
+        Args:
+            limit: Maximum number of videos to return
+            offset: Number of videos to skip
+            annotated: Filter by annotation status (None = all)
+
+        Returns:
+            Tuple of (videos, total count)
+        """
+        def query():
+            q = self.client.table("videos").select("*", count="exact")
+            if annotated is not None:
+                q = q.eq("annotated", annotated)
+            return q.range(offset, offset + limit - 1)
+
+        response = await self._run(query)
+        return response.data, response.count
 
     async def get_video_by_id(self, video_id: str):
-        """Get single video by ID"""
-        response = self.client.table("videos").select("*").eq("id", video_id).single().execute()
+        """Get single video by ID (cached for VIDEO_CACHE_TTL_SECONDS)"""
+        cached = self._video_cache.get(video_id)
+        if cached and time.monotonic() - cached[0] < VIDEO_CACHE_TTL_SECONDS:
+            return cached[1]
+
+        generation = self._video_cache_generation
+        response = await self._run(
+            lambda: self.client.table("videos").select("*").eq("id", video_id).single()
+        )
+
+        if generation != self._video_cache_generation:
+            return response.data
+
+        if len(self._video_cache) >= VIDEO_CACHE_MAX_SIZE:
+            self._video_cache.pop(next(iter(self._video_cache)))
+        self._video_cache[video_id] = (time.monotonic(), response.data)
+
         return response.data
 
+    async def video_exists(self, video_id: str) -> bool:
+        """Check whether a video exists, fetching only its ID"""
+        cached = self._video_cache.get(video_id)
+        if cached and time.monotonic() - cached[0] < VIDEO_CACHE_TTL_SECONDS:
+            return cached[1] is not None
+
+        response = await self._run(
+            lambda: self.client.table("videos").select("id").eq("id", video_id).maybe_single()
+        )
+        return response is not None and response.data is not None
+
+    def _invalidate_video(self, video_id: str):
+        """Drop a video from the cache after it has been modified"""
+        self._video_cache_generation += 1
+        self._video_cache.pop(video_id, None)
+
     async def create_video(self, video_data: dict):
         """Create new video record"""
-        response = self.client.table("videos").insert(video_data).execute()
+        response = await self._run(lambda: self.client.table("videos").insert(video_data))
         return response.data[0] if response.data else None
 
     async def update_video(self, video_id: str, updates: dict):
         """Update video record"""
-        response = self.client.table("videos").update(updates).eq("id", video_id).execute()
+        response = await self._run(lambda: self.client.table("videos").update(updates).eq("id", video_id))
+        self._invalidate_video(video_id)
         return response.data[0] if response.data else None
 
     async def delete_video(self, video_id: str):
-        """Delete video record"""
-        response = self.client.table("videos").delete().eq("id", video_id).execute()
+        """
+        Delete video record and log the activity in one transaction.
+
+        Returns:
+            Deleted video record, or None if the video doesn't exist
+        """
+        response = await self._run(
+            lambda: self.client.rpc("delete_video", {"p_video_id": video_id})
+        )
+        self._invalidate_video(video_id)
+        return response.data
+
+    async def acquire_video_lock(self, video_id: str, user_id: str, timeout_minutes: int = 60):
+        """
+        Atomically lock a video unless another user holds an unexpired lock.
+
+        Returns:
+            Dict with "acquired" (bool) and "video" (current video record,
+            or None if the video doesn't exist)
+        """
+        response = await self._run(
+            lambda: self.client.rpc("acquire_video_lock", {
+                "p_video_id": video_id,
+                "p_user_id": user_id,
+                "p_timeout_minutes": timeout_minutes
+            })
+        )
+        self._invalidate_video(video_id)
+        return response.data
+
+    # Annotations operations
+    async def get_annotation(self, video_id: str):
+        """Get annotation for a video"""
+        response = await self._run(
+            lambda: self.client.table("annotations").select("*").eq("video_id", video_id)
+        )
+        return response.data[0] if response.data else None
+
+    async def complete_annotation(
+        self,
+        video_id: str,
+        frames_annotated: int,
+        detection_count: int,
+        species_counts: dict,
+        storage_path: str
+    ):
+        """
+        Save annotation, mark the video annotated, release its lock and log
+        the activity in one transaction.
+
+        Returns:
+            Created or updated annotation record
+        """
+        response = await self._run(
+            lambda: self.client.rpc("complete_annotation", {
+                "p_video_id": video_id,
+                "p_frames_annotated": frames_annotated,
+                "p_detection_count": detection_count,
+                "p_species_counts": species_counts,
+                "p_storage_path": storage_path
+            })
+        )
+        self._invalidate_video(video_id)
+        return response.data
+
+    async def delete_annotation(self, video_id: str):
+        """
+        Delete annotation, reset the video's annotation status and log the
+        activity in one transaction.
+
+        Returns:
+            Deleted annotation record, or None if there was no annotation
+        """
+        response = await self._run(
+            lambda: self.client.rpc("delete_annotation", {"p_video_id": video_id})
+        )
+        self._invalidate_video(video_id)
         return response.data
 
     # Storage operations
-    def upload_file(self, bucket: str, path: str, file_data: bytes):
+    async def upload_file(self, bucket: str, path: str, file_data: bytes):
         """Upload file to storage"""
-        response = self.client.storage.from_(bucket).upload(path, file_data)
-        return response
+        return await asyncio.to_thread(self.client.storage.from_(bucket).upload, path, file_data)
 
-    def download_file(self, bucket: str, path: str):
+    async def upload_stream(
+        self,
+        bucket: str,
+        path: str,
+        file: BinaryIO,
+        size: int,
+        content_type: str
+    ):
+        """
+        Upload a file object to storage in chunks, without reading it into memory.
+
+        Args:
+            bucket: Storage bucket name
+            path: Object path within the bucket
+            file: Binary file object positioned at the start of the data
+            size: Number of bytes to upload
+            content_type: MIME type of the file
+        """
+        def chunks():
+            while chunk := file.read(UPLOAD_CHUNK_SIZE):
+                yield chunk
+
+        def upload():
+            response = self.client.storage.session.post(
+                f"/object/{bucket}/{path}",
+                content=chunks(),
+                headers={
+                    "content-type": content_type,
+                    "content-length": str(size),
+                    "cache-control": "max-age=3600",
+                    "x-upsert": "false"
+                }
+            )
+            if response.is_error:
+                raise StorageException(
+                    {**response.json(), "statusCode": response.status_code}
+                )
+            return response
+
+        return await asyncio.to_thread(upload)
+
+    async def download_file(self, bucket: str, path: str):
         """Download file from storage"""
-        response = self.client.storage.from_(bucket).download(path)
-        return response
+        return await asyncio.to_thread(self.client.storage.from_(bucket).download, path)
 
     def get_public_url(self, bucket: str, path: str):
-        """Get public URL for file"""
-        response = self.client.storage.from_(bucket).get_public_url(path)
-        return response
+        """Get public URL for file (cached, as it never changes for a path)"""
+        key = (bucket, path)
+        url = self._public_url_cache.get(key)
+        if url is None:
+            url = self.client.storage.from_(bucket).get_public_url(path)
+            if len(self._public_url_cache) >= PUBLIC_URL_CACHE_MAX_SIZE:
+                self._public_url_cache.pop(next(iter(self._public_url_cache)))
+            self._public_url_cache[key] = url
+        return url
 
-    def delete_file(self, bucket: str, path: str):
+    async def delete_file(self, bucket: str, path: str):
         """Delete file from storage"""
-        response = self.client.storage.from_(bucket).remove([path])
-        return response
+        self._public_url_cache.pop((bucket, path), None)
+        return await asyncio.to_thread(self.client.storage.from_(bucket).remove, [path])
 
     # Activity logging
     async def log_activity(
@@ -124,7 +455,7 @@ class SupabaseService:
         resource_id: str = None,
         metadata: dict = None
     ):
-        """Log user activity"""
+        """Queue user activity to be inserted with the next batch"""
         activity_data = {
             "action_type": action_type,
             "resource_type": resource_type,
@@ -132,5 +463,66 @@ class SupabaseService:
             "metadata": metadata or {}
         }
 
-        response = self.client.table("activity_log").insert(activity_data).execute()
-        return response.data[0] if response.data else None
+        if self._activity_task is None:
+            self._activity_queue = asyncio.Queue()
+            self._activity_task = asyncio.create_task(self._process_activity_queue())
+
+        self._activity_queue.put_nowait(activity_data)
+
+    async def _insert_activities(self, batch: List[dict]):
+        """Insert a batch of activity entries"""
+        try:
+            await self._run(lambda: self.client.table("activity_log").insert(batch))
+        except Exception as e:
+            print(f"❌ Failed to log {len(batch)} activities: {e}")
+
+    async def _process_activity_queue(self):
+        """Collect queued activity entries into batches and insert them"""
+        loop = asyncio.get_running_loop()
+        queue = self._activity_queue
+
+        while True:
+            batch = []
+            entry = await queue.get()
+            deadline = loop.time() + ACTIVITY_FLUSH_INTERVAL
+
+            while entry is not None:
+                batch.append(entry)
+                timeout = deadline - loop.time()
+                if len(batch) >= ACTIVITY_BATCH_SIZE or timeout <= 0:
+                    break
+                try:
+                    entry = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+
+            if batch:
+                await self._insert_activities(batch)
+
+            # flush_activity_log queues None to stop processing
+            if entry is None:
+                return
+
+    async def flush_activity_log(self):
+        """Insert any queued activity entries and stop batching"""
+        if self._activity_task is None:
+            return
+
+        task = self._activity_task
+        self._activity_task = None
+        self._activity_queue.put_nowait(None)
+        await task
+
+
+@lru_cache()
+def get_supabase_service() -> SupabaseService:
+    """
+    Get SupabaseService singleton.
+
+    Used as a FastAPI dependency so every request shares the same
+    underlying client and its connection pool.
+
+    Returns:
+        SupabaseService instance
+    """
+    return SupabaseService()
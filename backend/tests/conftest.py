@@ -0,0 +1,108 @@
+"""
+Shared pytest configuration and fixtures for backend tests.
+"""
+
+import sys
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# Make backend modules (config, services, routers) importable regardless of where pytest is run
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+class FakeQuery:
+    """Query builder recording what it was asked to run"""
+
+    def __init__(self, client, table: str, operation: str, payload=None):
+        self.client = client
+        self.table = table
+        self.operation = operation
+        self.payload = payload
+        self.filters = {}
+
+    def eq(self, column, value):
+        self.filters[column] = value
+        return self
+
+    def single(self):
+        return self
+
+    def maybe_single(self):
+        return self
+
+    def execute(self):
+        return self.client.execute(self)
+
+
+class FakeTable:
+    def __init__(self, client, name: str):
+        self.client = client
+        self.name = name
+
+    def select(self, columns="*", count=None):
+        return FakeQuery(self.client, self.name, "select")
+
+    def insert(self, rows):
+        return FakeQuery(self.client, self.name, "insert", rows)
+
+    def update(self, updates):
+        return FakeQuery(self.client, self.name, "update", updates)
+
+
+class FakeClient:
+    """
+    In-memory stand-in for the Supabase client.
+
+    Stores rows per table, records inserts and counts selects. Setting
+    pause_selects makes selects wait until resume_selects() is called,
+    so tests can act while a read is in flight.
+    """
+
+    def __init__(self):
+        self.rows = {}
+        self.inserts = []
+        self.select_count = 0
+        self.fail_inserts = 0
+        self.pause_selects = False
+        self.select_started = threading.Event()
+        self._resume = threading.Event()
+
+    def table(self, name: str):
+        return FakeTable(self, name)
+
+    def resume_selects(self):
+        self._resume.set()
+
+    def execute(self, query: FakeQuery):
+        rows = self.rows.setdefault(query.table, {})
+
+        if query.operation == "insert":
+            if self.fail_inserts:
+                self.fail_inserts -= 1
+                raise RuntimeError("insert failed")
+            self.inserts.append((query.table, list(query.payload)))
+            return SimpleNamespace(data=query.payload)
+
+        if query.operation == "update":
+            row = rows[query.filters["id"]]
+            row.update(query.payload)
+            return SimpleNamespace(data=[dict(row)])
+
+        # Read the row before pausing, as the database would have
+        self.select_count += 1
+        row = rows.get(query.filters["id"])
+        data = dict(row) if row else None
+
+        if self.pause_selects:
+            self.select_started.set()
+            self._resume.wait(timeout=5)
+
+        return SimpleNamespace(data=data)
+
+
+@pytest.fixture
+def fake_client():
+    return FakeClient()
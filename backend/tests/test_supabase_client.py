@@ -0,0 +1,187 @@
+"""
+Tests for SupabaseService's video cache and activity log batching.
+"""
+
+import asyncio
+
+import pytest
+
+from services import supabase_client
+from services.supabase_client import SupabaseService
+
+
+@pytest.fixture
+def service(fake_client):
+    return SupabaseService(client=fake_client)
+
+
+@pytest.fixture
+def videos(fake_client):
+    rows = {
+        str(i): {"id": str(i), "filename": f"video_{i}.mp4", "annotated": False}
+        for i in range(5)
+    }
+    fake_client.rows["videos"] = rows
+    return rows
+
+
+# Video cache
+@pytest.mark.asyncio
+async def test_get_video_by_id_is_cached(service, fake_client, videos):
+    first = await service.get_video_by_id("1")
+    second = await service.get_video_by_id("1")
+
+    assert first == second == videos["1"]
+    assert fake_client.select_count == 1
+
+
+@pytest.mark.asyncio
+async def test_video_cache_expires(service, fake_client, videos):
+    await service.get_video_by_id("1")
+
+    # Age the entry past the TTL
+    cached_at, row = service._video_cache["1"]
+    service._video_cache["1"] = (cached_at - supabase_client.VIDEO_CACHE_TTL_SECONDS, row)
+    await service.get_video_by_id("1")
+
+    assert fake_client.select_count == 2
+
+
+@pytest.mark.asyncio
+async def test_video_cache_evicts_oldest(service, fake_client, videos, monkeypatch):
+    monkeypatch.setattr(supabase_client, "VIDEO_CACHE_MAX_SIZE", 3)
+
+    for video_id in ("0", "1", "2", "3"):
+        await service.get_video_by_id(video_id)
+
+    assert list(service._video_cache) == ["1", "2", "3"]
+
+    await service.get_video_by_id("0")
+    assert fake_client.select_count == 5
+
+
+@pytest.mark.asyncio
+async def test_video_exists_uses_cache(service, fake_client, videos):
+    await service.get_video_by_id("1")
+
+    assert await service.video_exists("1") is True
+    assert fake_client.select_count == 1
+
+    assert await service.video_exists("missing") is False
+    assert fake_client.select_count == 2
+
+
+@pytest.mark.asyncio
+async def test_update_invalidates_cached_video(service, fake_client, videos):
+    await service.get_video_by_id("1")
+    await service.update_video("1", {"annotated": True})
+
+    video = await service.get_video_by_id("1")
+
+    assert video["annotated"] is True
+    assert fake_client.select_count == 2
+
+
+@pytest.mark.asyncio
+async def test_invalidation_during_read_is_not_cached(service, fake_client, videos):
+    fake_client.pause_selects = True
+    read = asyncio.create_task(service.get_video_by_id("1"))
+    assert await asyncio.to_thread(fake_client.select_started.wait, 5)
+
+    # The row changes while the read is in flight
+    await service.update_video("1", {"annotated": True})
+    fake_client.resume_selects()
+
+    # The read returns what it fetched, but must not cache it
+    assert (await read)["annotated"] is False
+    assert "1" not in service._video_cache
+
+    video = await service.get_video_by_id("1")
+    assert video["annotated"] is True
+
+
+# Activity logging
+def batch_sizes(fake_client):
+    return [len(rows) for table, rows in fake_client.inserts if table == "activity_log"]
+
+
+@pytest.mark.asyncio
+async def test_activity_log_batches_by_size(service, fake_client, monkeypatch):
+    # Long interval, so batches are only cut by size (or the flush)
+    monkeypatch.setattr(supabase_client, "ACTIVITY_FLUSH_INTERVAL", 60)
+
+    for i in range(250):
+        await service.log_activity("video_viewed", "video", str(i))
+
+    await service.flush_activity_log()
+
+    assert batch_sizes(fake_client) == [100, 100, 50]
+    inserted = [row["resource_id"] for _, rows in fake_client.inserts for row in rows]
+    assert inserted == [str(i) for i in range(250)]
+
+
+@pytest.mark.asyncio
+async def test_activity_log_flushes_after_interval(service, fake_client, monkeypatch):
+    monkeypatch.setattr(supabase_client, "ACTIVITY_FLUSH_INTERVAL", 0.05)
+
+    for i in range(3):
+        await service.log_activity("video_viewed", "video", str(i))
+    await asyncio.sleep(0.3)
+
+    # Inserted without waiting for a full batch or a flush
+    assert batch_sizes(fake_client) == [3]
+
+    await service.log_activity("video_viewed", "video", "3")
+    await asyncio.sleep(0.3)
+
+    assert batch_sizes(fake_client) == [3, 1]
+    await service.flush_activity_log()
+    assert batch_sizes(fake_client) == [3, 1]
+
+
+@pytest.mark.asyncio
+async def test_flush_inserts_pending_entries(service, fake_client, monkeypatch):
+    monkeypatch.setattr(supabase_client, "ACTIVITY_FLUSH_INTERVAL", 60)
+
+    await service.log_activity("annotation_started", "video", "1")
+    await service.log_activity("annotation_completed", "video", "1")
+    await asyncio.sleep(0)
+    assert batch_sizes(fake_client) == []
+
+    await service.flush_activity_log()
+
+    assert batch_sizes(fake_client) == [2]
+    assert service._activity_task is None
+
+
+@pytest.mark.asyncio
+async def test_flush_without_activity_is_noop(service, fake_client):
+    await service.flush_activity_log()
+
+    assert fake_client.inserts == []
+
+
+@pytest.mark.asyncio
+async def test_activity_log_restarts_after_flush(service, fake_client, monkeypatch):
+    monkeypatch.setattr(supabase_client, "ACTIVITY_FLUSH_INTERVAL", 60)
+
+    await service.log_activity("video_viewed", "video", "1")
+    await service.flush_activity_log()
+    await service.log_activity("video_viewed", "video", "2")
+    await service.flush_activity_log()
+
+    assert batch_sizes(fake_client) == [1, 1]
+
+
+@pytest.mark.asyncio
+async def test_failed_insert_keeps_processing(service, fake_client, monkeypatch):
+    monkeypatch.setattr(supabase_client, "ACTIVITY_BATCH_SIZE", 2)
+    monkeypatch.setattr(supabase_client, "ACTIVITY_FLUSH_INTERVAL", 60)
+    fake_client.fail_inserts = 1
+
+    for i in range(4):
+        await service.log_activity("video_viewed", "video", str(i))
+    await service.flush_activity_log()
+
+    # The first batch is dropped (and reported), the second still goes in
+    assert batch_sizes(fake_client) == [2]
@@ -8,13 +8,18 @@ so the browser can launch the desktop app.
 import sys
 import os
 import platform
+import subprocess
+import tempfile
+
+def _reg_string(value):
+    """Quote a string value for a .reg file"""
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
 
 def register_protocol_windows():
     """Register oceanml:// protocol on Windows"""
-    try:
-        import winreg
-    except ImportError:
-        print("❌ winreg module not available. Are you on Windows?")
+    if platform.system() != "Windows":
+        print("❌ reg.exe not available. Are you on Windows?")
         return False
 
     protocol = "oceanml"
@@ -29,22 +34,39 @@ def register_protocol_windows():
         print(f"❌ Main script not found at: {main_script}")
         return False
 
+    # Command to launch the app
+    command = f'"{python_exe}" "{main_script}" "%1"'
+
+    # Write all keys to one .reg file so they're imported in a single step
+    key_path = f"HKEY_CURRENT_USER\\Software\\Classes\\{protocol}"
+    reg_file = "\n".join([
+        "Windows Registry Editor Version 5.00",
+        "",
+        f"[{key_path}]",
+        f"@={_reg_string(f'URL:{app_name} Protocol')}",
+        '"URL Protocol"=""',
+        "",
+        f"[{key_path}\\shell\\open\\command]",
+        f"@={_reg_string(command)}",
+        "",
+    ])
+
     try:
-        # Create protocol key
-        key_path = f"Software\\Classes\\{protocol}"
-        key = winreg.CreateKey(winreg.HKEY_CURRENT_USER, key_path)
-        winreg.SetValue(key, "", winreg.REG_SZ, f"URL:{app_name} Protocol")
-        winreg.SetValueEx(key, "URL Protocol", 0, winreg.REG_SZ, "")
-        winreg.CloseKey(key)
-
-        # Create command key
-        command_path = f"{key_path}\\shell\\open\\command"
-        command_key = winreg.CreateKey(winreg.HKEY_CURRENT_USER, command_path)
-
-        # Command to launch the app
-        command = f'"{python_exe}" "{main_script}" "%1"'
-        winreg.SetValue(command_key, "", winreg.REG_SZ, command)
-        winreg.CloseKey(command_key)
+        with tempfile.NamedTemporaryFile(
+            "w", suffix=".reg", encoding="utf-16", newline="\r\n", delete=False
+        ) as f:
+            f.write(reg_file)
+            reg_path = f.name
+
+        try:
+            subprocess.run(
+                ["reg", "import", reg_path],
+                check=True,
+                capture_output=True,
+                text=True
+            )
+        finally:
+            os.remove(reg_path)
 
         print(f"✅ Protocol handler registered successfully!")
         print(f"   Protocol: {protocol}://")
@@ -53,6 +75,9 @@ def register_protocol_windows():
 
         return True
 
+    except subprocess.CalledProcessError as e:
+        print(f"❌ Error registering protocol: {e.stderr.strip()}")
+        return False
     except Exception as e:
         print(f"❌ Error registering protocol: {e}")
         return False
@@ -60,27 +85,36 @@ def register_protocol_windows():
 
 def unregister_protocol_windows():
     """Unregister oceanml:// protocol on Windows"""
-    try:
-        import winreg
-    except ImportError:
-        print("❌ winreg module not available")
+    if platform.system() != "Windows":
+        print("❌ reg.exe not available")
         return False
 
     protocol = "oceanml"
+    key_path = f"HKCU\\Software\\Classes\\{protocol}"
 
     try:
-        key_path = f"Software\\Classes\\{protocol}"
-        winreg.DeleteKey(winreg.HKEY_CURRENT_USER, f"{key_path}\\shell\\open\\command")
-        winreg.DeleteKey(winreg.HKEY_CURRENT_USER, f"{key_path}\\shell\\open")
-        winreg.DeleteKey(winreg.HKEY_CURRENT_USER, f"{key_path}\\shell")
-        winreg.DeleteKey(winreg.HKEY_CURRENT_USER, key_path)
+        registered = subprocess.run(
+            ["reg", "query", key_path],
+            capture_output=True
+        ).returncode == 0
+
+        if not registered:
+            print("⚠️  Protocol handler was not registered")
+            return True
+
+        subprocess.run(
+            ["reg", "delete", key_path, "/f"],
+            check=True,
+            capture_output=True,
+            text=True
+        )
 
         print(f"✅ Protocol handler unregistered successfully!")
         return True
 
-    except FileNotFoundError:
-        print("⚠️  Protocol handler was not registered")
-        return True
+    except subprocess.CalledProcessError as e:
+        print(f"❌ Error unregistering protocol: {e.stderr.strip()}")
+        return False
     except Exception as e:
         print(f"❌ Error unregistering protocol: {e}")
         return False
@@ -4,17 +4,129 @@ Protocol Handler Service
 Parses oceanml:// URLs and extracts video ID and auth token.
 """
 
-from urllib.parse import urlparse, parse_qs
-from typing import Optional, Dict
+import re
+import sys
+from enum import IntEnum
+from functools import lru_cache
+from urllib.parse import unquote_plus
+from typing import Iterable, List, NamedTuple, Optional
+
+
+# URL scheme syntax (RFC 3986), for reporting the scheme of a rejected URL
+_SCHEME_RE = re.compile(r"[A-Za-z][A-Za-z0-9+.-]*")
+
+# Known actions, interned so parsed actions compare by identity
+_ACTIONS = {sys.intern(a): sys.intern(a) for a in ("annotate",)}
+
+
+class ValidationError(IntEnum):
+    """Result of ProtocolHandler.validate_params (OK is falsy)"""
+    OK = 0
+    MISSING_ACTION = 1
+    MISSING_VIDEO = 2
+    MISSING_TOKEN = 3
+    BAD_TOKEN = 4
+
+
+_ERROR_MESSAGES = (
+    "✅ Valid",
+    "❌ Missing action",
+    "❌ Missing video_id",
+    "❌ Missing token",
+    "❌ Invalid token format",
+)
+
+
+# First missing field for each missing-field bit mask (see validate_params)
+_MISSING_ERRORS = (
+    ValidationError.OK,
+    ValidationError.MISSING_ACTION,
+    ValidationError.MISSING_VIDEO,
+    ValidationError.MISSING_ACTION,
+    ValidationError.MISSING_TOKEN,
+    ValidationError.MISSING_ACTION,
+    ValidationError.MISSING_VIDEO,
+    ValidationError.MISSING_ACTION,
+)
+
+
+def format_error(error: ValidationError) -> str:
+    """Get a readable message for a validation result"""
+    return _ERROR_MESSAGES[error]
+
+
+class ParsedURL(NamedTuple):
+    """Parameters extracted from a protocol URL"""
+    action: Optional[str]
+    video_id: Optional[str]
+    token: Optional[str]
+
+
+def _unquote(value: str) -> str:
+    """Decode a query value, only paying for it when it's encoded"""
+    if "%" in value or "+" in value:
+        return unquote_plus(value)
+    return value
+
+
+@lru_cache(maxsize=128)
+def _parse_oceanml(rest: str) -> ParsedURL:
+    """
+    Parse the part of a protocol URL after "<scheme>://".
+
+    Splits the fixed <action>?video=<id>&token=<token> form directly
+    rather than going through urlparse/parse_qs, and is cached, as the
+    same deep link is often parsed repeatedly.
+    """
+    # Extract action (part before any path or query)
+    rest = rest.partition("#")[0]
+    location, _, query = rest.partition("?")
+    action = location.partition("/")[0]
+    action = _ACTIONS.get(action, action)
+
+    # Extract video ID and auth token (first non-empty value of each)
+    video_id = None
+    token = None
+    for pair in query.split("&"):
+        key, _, value = pair.partition("=")
+        if not value:
+            continue
+        if key == "video":
+            if video_id is None:
+                video_id = _unquote(value)
+        elif key == "token":
+            if token is None:
+                token = _unquote(value)
+
+    return ParsedURL(action, video_id, token)
 
 
 class ProtocolHandler:
     """Handles oceanml:// protocol URLs"""
 
+    __slots__ = (
+        "protocol",
+        "_scheme_prefix",
+        "_scheme_prefix_len",
+        "_err_msg_prefix",
+        "_url_re",
+    )
+
     def __init__(self, protocol: str = "oceanml"):
         self.protocol = protocol
-
-    def parse_url(self, url: str) -> Dict[str, Optional[str]]:
+        self._scheme_prefix = f"{protocol}://"
+        self._scheme_prefix_len = len(self._scheme_prefix)
+        self._err_msg_prefix = f"Invalid protocol. Expected '{protocol}://', got '"
+
+        # <protocol>://<action>?... with non-empty video and token values
+        # (first occurrence of each), for parse_url_fast
+        self._url_re = re.compile(
+            rf"(?i:{re.escape(protocol)})://([^/?#]+)(?:/[^?#]*)?\?"
+            r"(?=(?:[^#]*?&)??video=([^&#]+))"
+            r"(?=(?:[^#]*?&)??token=([^&#]+))"
+        )
+
+    def parse_url(self, url: str) -> ParsedURL:
         """
         Parse oceanml:// URL and extract parameters.
 
@@ -22,7 +134,7 @@ class ProtocolHandler:
             url: Protocol URL (e.g., oceanml://annotate?video=123&token=abc)
 
         Returns:
-            Dictionary with action, video_id, and token
+            ParsedURL with action, video_id, and token
 
         Raises:
             ValueError: If URL format is invalid
@@ -31,37 +143,53 @@ class ProtocolHandler:
             >>> handler = ProtocolHandler()
             >>> result = handler.parse_url("oceanml://annotate?video=123&token=abc")
             >>> result
-            {'action': 'annotate', 'video_id': '123', 'token': 'abc'}
+            ParsedURL(action='annotate', video_id='123', token='abc')
         """
-        try:
-            parsed = urlparse(url)
+        prefix = self._scheme_prefix
+        prefix_len = self._scheme_prefix_len
 
-            # Check protocol
-            if parsed.scheme != self.protocol:
-                raise ValueError(
-                    f"Invalid protocol. Expected '{self.protocol}://', got '{parsed.scheme}://'"
-                )
+        # Check protocol (schemes are case-insensitive)
+        if not url.startswith(prefix) and url[:prefix_len].lower() != prefix:
+            # Only report the scheme, never the rest of the URL (it may hold a token)
+            scheme = url.partition(":")[0]
+            if not _SCHEME_RE.fullmatch(scheme):
+                scheme = ""
+            raise ValueError(self._err_msg_prefix + scheme.lower() + "://'")
 
-            # Extract action (netloc part)
-            action = parsed.netloc or parsed.path.split("/")[0]
+        return _parse_oceanml(url[prefix_len:])
 
-            # Extract query parameters
-            params = parse_qs(parsed.query)
+    def parse_url_fast(self, url: str) -> Optional[ParsedURL]:
+        """
+        Parse a URL with a single precompiled regex match.
 
-            # Get video ID
-            video_id = params.get("video", [None])[0]
+        Unlike parse_url, returns None instead of raising on a wrong
+        protocol, and also when the action, video or token is missing.
 
-            # Get auth token
-            token = params.get("token", [None])[0]
+        Args:
+            url: Protocol URL (e.g., oceanml://annotate?video=123&token=abc)
 
-            return {
-                "action": action,
-                "video_id": video_id,
-                "token": token
-            }
+        Returns:
+            ParsedURL, or None if the URL doesn't match
+        """
+        match = self._url_re.match(url)
+        if match is None:
+            return None
 
-        except Exception as e:
-            raise ValueError(f"Failed to parse URL: {e}")
+        action, video_id, token = match.groups()
+        return ParsedURL(_ACTIONS.get(action, action), _unquote(video_id), _unquote(token))
+
+    def parse_batch(self, urls: Iterable[str]) -> List[Optional[ParsedURL]]:
+        """
+        Parse many URLs with parse_url_fast.
+
+        Args:
+            urls: Protocol URLs
+
+        Returns:
+            ParsedURL (or None if it doesn't match) for each URL, in order
+        """
+        parse = self.parse_url_fast
+        return [parse(url) for url in urls]
 
     def validate_token(self, token: str) -> bool:
         """
@@ -73,42 +201,33 @@ class ProtocolHandler:
         Returns:
             True if token appears valid (has 3 parts), False otherwise
         """
-        if not token:
-            return False
-
-        parts = token.split(".")
-        return len(parts) == 3  # JWT has header.payload.signature
+        # JWT has header.payload.signature; count dots rather than splitting
+        return bool(token) and token.count(".") == 2
 
-    def validate_params(self, params: Dict[str, Optional[str]]) -> bool:
+    def validate_params(self, params: ParsedURL) -> ValidationError:
         """
         Validate that required parameters are present.
 
         Args:
-            params: Dictionary from parse_url()
+            params: ParsedURL from parse_url()
 
         Returns:
-            True if all required params present and valid
+            ValidationError.OK (falsy) if all required params are present
+            and valid, otherwise the first problem found
         """
-        # Check action
-        if not params.get("action"):
-            print("❌ Missing action")
-            return False
-
-        # Check video ID
-        if not params.get("video_id"):
-            print("❌ Missing video_id")
-            return False
-
-        # Check token
-        if not params.get("token"):
-            print("❌ Missing token")
-            return False
+        # One bit per missing field: action, video_id, token
+        missing = (
+            (not params.action)
+            | ((not params.video_id) << 1)
+            | ((not params.token) << 2)
+        )
+        if missing:
+            return _MISSING_ERRORS[missing]
 
-        if not self.validate_token(params["token"]):
-            print("❌ Invalid token format")
-            return False
+        if not self.validate_token(params.token):
+            return ValidationError.BAD_TOKEN
 
-        return True
+        return ValidationError.OK
 
 
 def test_protocol_handler():
@@ -120,7 +239,8 @@ def test_protocol_handler():
     try:
         result = handler.parse_url("oceanml://annotate?video=123&token=eyJ0.eyJ1.sig")
         print(f"  Result: {result}")
-        print(f"  Valid: {handler.validate_params(result)}")
+        error = handler.validate_params(result)
+        print(f"  Valid: {format_error(error)}")
     except Exception as e:
         print(f"  Error: {e}")
 
@@ -131,7 +251,8 @@ def test_protocol_handler():
     try:
         result = handler.parse_url("oceanml://annotate?video=123")
         print(f"  Result: {result}")
-        print(f"  Valid: {handler.validate_params(result)}")
+        error = handler.validate_params(result)
+        print(f"  Valid: {format_error(error)}")
     except Exception as e:
         print(f"  Error: {e}")
 
@@ -0,0 +1,9 @@
+"""
+Shared pytest configuration for desktop tests.
+"""
+
+import sys
+from pathlib import Path
+
+# Make desktop modules (services, ui) importable regardless of where pytest is run
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,141 @@
+"""
+Tests for the oceanml:// protocol handler.
+"""
+
+import pytest
+
+from services.protocol_handler import ParsedURL, ProtocolHandler, ValidationError
+
+
+TOKEN = "eyJ0.eyJ1.sig"
+
+
+@pytest.fixture
+def handler():
+    return ProtocolHandler()
+
+
+def test_parse_valid_url(handler):
+    result = handler.parse_url(f"oceanml://annotate?video=123&token={TOKEN}")
+
+    assert result == ParsedURL("annotate", "123", TOKEN)
+    assert result.action == "annotate"
+    assert result.video_id == "123"
+    assert result.token == TOKEN
+    assert handler.validate_params(result) == ValidationError.OK
+
+
+def test_first_non_empty_value_wins(handler):
+    result = handler.parse_url("oceanml://annotate?video=1&video=2&token=a.b.c&token=x.y.z")
+
+    assert result.video_id == "1"
+    assert result.token == "a.b.c"
+
+
+def test_blank_values_skipped(handler):
+    result = handler.parse_url("oceanml://annotate?video=&video=7&token=&token=a.b.c")
+
+    assert result.video_id == "7"
+    assert result.token == "a.b.c"
+
+
+def test_blank_only_values_are_missing(handler):
+    result = handler.parse_url("oceanml://annotate?video=&token=a.b.c")
+
+    assert result.video_id is None
+    assert handler.validate_params(result) == ValidationError.MISSING_VIDEO
+
+
+def test_percent_and_plus_decoding(handler):
+    result = handler.parse_url("oceanml://annotate?video=a%2Fb+c&token=x%2Ey.z")
+
+    assert result.video_id == "a/b c"
+    assert result.token == "x.y.z"
+
+
+def test_scheme_is_case_insensitive(handler):
+    result = handler.parse_url(f"OceanML://annotate?video=123&token={TOKEN}")
+
+    assert result == ParsedURL("annotate", "123", TOKEN)
+
+
+def test_fragment_stripped(handler):
+    result = handler.parse_url(f"oceanml://annotate?video=123&token={TOKEN}#frame=10")
+
+    assert result.token == TOKEN
+
+
+def test_action_with_path(handler):
+    result = handler.parse_url(f"oceanml://annotate/extra?video=123&token={TOKEN}")
+
+    assert result.action == "annotate"
+
+
+def test_missing_params(handler):
+    result = handler.parse_url("oceanml://annotate?video=123")
+
+    assert result.token is None
+    assert handler.validate_params(result) == ValidationError.MISSING_TOKEN
+
+
+def test_bad_token_format(handler):
+    result = handler.parse_url("oceanml://annotate?video=123&token=abc")
+
+    assert handler.validate_params(result) == ValidationError.BAD_TOKEN
+
+
+def test_invalid_protocol(handler):
+    with pytest.raises(ValueError, match="got 'http://'"):
+        handler.parse_url("http://example.com")
+
+
+def test_scheme_without_slashes_rejected(handler):
+    with pytest.raises(ValueError, match="Invalid protocol"):
+        handler.parse_url(f"oceanml:annotate?video=123&token={TOKEN}")
+
+
+def test_invalid_protocol_error_omits_token(handler):
+    with pytest.raises(ValueError) as excinfo:
+        handler.parse_url("annotate?video=123&token=SECRET.TOKEN.VALUE")
+
+    assert "secret" not in str(excinfo.value).lower()
+
+
+@pytest.mark.parametrize("url", [
+    f"oceanml://annotate?video=123&token={TOKEN}",
+    f"OCEANML://annotate?token={TOKEN}&video=123",
+    "oceanml://annotate?video=&video=7&token=&token=a.b.c",
+    "oceanml://annotate?video=1&video=2&token=a.b.c&token=x.y.z",
+    "oceanml://annotate?video=a%2Fb+c&token=x%2Ey.z",
+    f"oceanml://annotate/extra?video=123&token={TOKEN}#frame=10",
+    f"oceanml://annotate?xvideo=1&video=2&token={TOKEN}",
+    f"oceanml://custom?video=123&token={TOKEN}",
+])
+def test_parse_url_fast_matches_parse_url(handler, url):
+    assert handler.parse_url_fast(url) == handler.parse_url(url)
+
+
+@pytest.mark.parametrize("url", [
+    "oceanml://annotate?video=123",
+    f"oceanml://annotate?token={TOKEN}",
+    f"oceanml://annotate?video=&token={TOKEN}",
+    f"oceanml://?video=123&token={TOKEN}",
+    f"oceanml://annotate#?video=123&token={TOKEN}",
+    f"oceanml://annotate?video=123#&token={TOKEN}",
+])
+def test_parse_url_fast_requires_all_params(handler, url):
+    assert handler.parse_url_fast(url) is None
+
+
+@pytest.mark.parametrize("url", [
+    f"http://annotate?video=123&token={TOKEN}",
+    f"oceanml:annotate?video=123&token={TOKEN}",
+])
+def test_parse_url_fast_rejects_wrong_protocol(handler, url):
+    assert handler.parse_url_fast(url) is None
+
+
+def test_parse_batch(handler):
+    urls = [f"oceanml://annotate?video=1&token={TOKEN}", "http://example.com"]
+
+    assert handler.parse_batch(urls) == [ParsedURL("annotate", "1", TOKEN), None]
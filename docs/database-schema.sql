@@ -249,6 +249,147 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
+-- Create function to atomically acquire a video lock
+-- Row-locks the video, then either takes the lock or reports the current
+-- holder from that same row, so two annotators can't both acquire the
+-- video and a lock released concurrently can't be reported as held.
+CREATE OR REPLACE FUNCTION acquire_video_lock(
+    p_video_id UUID,
+    p_user_id UUID,
+    p_timeout_minutes INTEGER DEFAULT 60
+)
+RETURNS JSONB AS $$
+DECLARE
+    locked_video videos;
+BEGIN
+    -- Waits for any concurrent lock/release of this video to commit
+    SELECT * INTO locked_video FROM videos WHERE id = p_video_id FOR UPDATE;
+
+    IF NOT FOUND THEN
+        -- Missing, or hidden by the update policy: the caller can't lock it
+        SELECT * INTO locked_video FROM videos WHERE id = p_video_id;
+
+        RETURN jsonb_build_object(
+            'acquired', FALSE,
+            'video', CASE WHEN FOUND THEN to_jsonb(locked_video) END
+        );
+    END IF;
+
+    IF locked_video.locked_by IS NOT NULL AND locked_video.lock_expires_at > NOW() THEN
+        RETURN jsonb_build_object('acquired', FALSE, 'video', to_jsonb(locked_video));
+    END IF;
+
+    UPDATE videos
+    SET locked_by = p_user_id,
+        locked_at = NOW(),
+        lock_expires_at = NOW() + make_interval(mins => p_timeout_minutes)
+    WHERE id = p_video_id
+    RETURNING * INTO locked_video;
+
+    RETURN jsonb_build_object('acquired', TRUE, 'video', to_jsonb(locked_video));
+END;
+$$ LANGUAGE plpgsql;
+
+-- Create function to complete an annotation
+-- Upserts the annotation, marks the video annotated, releases its lock
+-- and logs the activity in one transaction.
+CREATE OR REPLACE FUNCTION complete_annotation(
+    p_video_id UUID,
+    p_frames_annotated INTEGER,
+    p_detection_count INTEGER,
+    p_species_counts JSONB,
+    p_storage_path TEXT
+)
+RETURNS JSONB AS $$
+DECLARE
+    saved_annotation annotations;
+BEGIN
+    INSERT INTO annotations (video_id, annotated_by, frames_annotated, detection_count, species_counts, storage_path)
+    VALUES (p_video_id, auth.uid(), p_frames_annotated, p_detection_count, p_species_counts, p_storage_path)
+    ON CONFLICT (video_id) DO UPDATE
+    SET annotated_by = EXCLUDED.annotated_by,
+        frames_annotated = EXCLUDED.frames_annotated,
+        detection_count = EXCLUDED.detection_count,
+        species_counts = EXCLUDED.species_counts,
+        storage_path = EXCLUDED.storage_path
+    RETURNING * INTO saved_annotation;
+
+    UPDATE videos
+    SET annotated = TRUE,
+        annotated_by = auth.uid(),
+        annotated_at = NOW(),
+        annotation_storage_path = p_storage_path,
+        detection_count = p_detection_count,
+        locked_by = NULL,
+        locked_at = NULL,
+        lock_expires_at = NULL
+    WHERE id = p_video_id;
+
+    INSERT INTO activity_log (user_id, action_type, resource_type, resource_id, metadata)
+    VALUES (
+        auth.uid(), 'annotation_completed', 'video', p_video_id,
+        jsonb_build_object('frames_annotated', p_frames_annotated, 'detection_count', p_detection_count)
+    );
+
+    RETURN to_jsonb(saved_annotation);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Create function to delete an annotation
+-- Deletes the annotation, resets the video's annotation status and logs
+-- the activity in one transaction. Returns NULL if there was no annotation.
+CREATE OR REPLACE FUNCTION delete_annotation(p_video_id UUID)
+RETURNS JSONB AS $$
+DECLARE
+    deleted_annotation annotations;
+BEGIN
+    DELETE FROM annotations WHERE video_id = p_video_id
+    RETURNING * INTO deleted_annotation;
+
+    IF NOT FOUND THEN
+        RETURN NULL;
+    END IF;
+
+    UPDATE videos
+    SET annotated = FALSE,
+        annotated_by = NULL,
+        annotated_at = NULL,
+        annotation_storage_path = NULL,
+        detection_count = 0
+    WHERE id = p_video_id;
+
+    INSERT INTO activity_log (user_id, action_type, resource_type, resource_id)
+    VALUES (auth.uid(), 'annotation_deleted', 'video', p_video_id);
+
+    RETURN to_jsonb(deleted_annotation);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Create function to delete a video
+-- Deletes the video (annotations cascade) and logs the activity in one
+-- transaction. Returns NULL if the video doesn't exist.
+CREATE OR REPLACE FUNCTION delete_video(p_video_id UUID)
+RETURNS JSONB AS $$
+DECLARE
+    deleted_video videos;
+BEGIN
+    DELETE FROM videos WHERE id = p_video_id
+    RETURNING * INTO deleted_video;
+
+    IF NOT FOUND THEN
+        RETURN NULL;
+    END IF;
+
+    INSERT INTO activity_log (user_id, action_type, resource_type, resource_id, metadata)
+    VALUES (
+        auth.uid(), 'video_deleted', 'video', p_video_id,
+        jsonb_build_object('filename', deleted_video.filename)
+    );
+
+    RETURN to_jsonb(deleted_video);
+END;
+$$ LANGUAGE plpgsql;
+
 -- Success message
 DO $$
 BEGIN